@@ -1,4 +1,4 @@
-from .problem＿generator import generate_problem
-from .problem_loading import load_problem, fixed_upper, setlowerobj
+from .problem＿generator import generate_problem, generate_problem_dict, save_problem
+from .problem_loading import load_problem, load_problem_from_dict, fixed_upper, setlowerobj, build_problem_template, update_problem_template
 from .triviality import nontrivial_BMIP_generator, Triviality_calculate
 __all__ = ["nontrivial_BMIP_generator", "Triviality_calculate"]
\ No newline at end of file
@@ -2,56 +2,117 @@
 import numpy as np
 import os
 import json
-import pandas as pd
+try:
+    import orjson  # Optional C-accelerated JSON encoder
+except ImportError:
+    orjson = None
 #%%
-def generate_problem(folder, parameters):
+_WRITE_BUFFER = 1 << 20
+_DECIMALS = 6
+
+def _round_inplace(arr, decimals=_DECIMALS):
     """
-    Generate and save a bi-level optimization problem instance.
+    Round a matrix/vector to a fixed number of decimals without temporaries.
+
+    Args:
+        arr (np.ndarray): Matrix/vector rounded in place
+        decimals (int): Number of decimal places to keep
+    """
+    scale = 10.0 ** decimals
+    np.multiply(arr, scale, out=arr)
+    np.rint(arr, out=arr)
+    np.divide(arr, scale, out=arr)
+
+def _fast_write_matrix(fh, arr, block=4096):
+    """
+    Write a 2-D matrix as comma-separated '%.6f' rows to a binary file handle.
     
-    This function creates a complete problem instance including constraint matrices,
-    objective vectors, and associated parameters for both upper and lower level
-    optimization problems.
+    The row format string is built once and applied to plain Python floats,
+    and each block of rows is emitted with a single write call.
+
+    Args:
+        fh (BinaryIO): Open binary file handle
+        arr (np.ndarray): 2-D matrix to write
+        block (int): Number of rows formatted per write
+    """
+    n_rows, n_cols = arr.shape
+    row_fmt = ','.join(['%.6f'] * n_cols) + '\n'
+    for r in range(0, n_rows, block):
+        rows = arr[r:r + block].tolist()
+        fh.write(''.join(row_fmt % tuple(row) for row in rows).encode())
+
+def _save_csv(path, arr):
+    """
+    Write a matrix/vector as CSV with a positional header row.
+
+    Args:
+        path (str): Destination file path
+        arr (np.ndarray): 2-D matrix, or 1-D vector written as a single column
+    """
+    arr = arr.reshape(-1, 1) if arr.ndim == 1 else arr
+    header = ','.join(map(str, range(arr.shape[1])))
+    # One large user-space buffer so the whole file reaches the OS in few writes
+    with open(path, 'wb', buffering=_WRITE_BUFFER) as fh:
+        fh.write(f"{header}\n".encode())
+        _fast_write_matrix(fh, arr)
+
+def _save_npy(path, arr):
+    """
+    Write a matrix/vector in NumPy's binary .npy format.
+
+    Args:
+        path (str): Destination file path
+        arr (np.ndarray): Matrix/vector to save
+    """
+    np.save(path, arr)
+
+def _save_npz(path, arrays):
+    """
+    Write all matrices/vectors into a single .npz archive.
+
+    Args:
+        path (str): Destination archive path
+        arrays (dict): Array name -> matrix/vector to store under that name
+    """
+    np.savez(path, **arrays)
+
+def _save_json(path, obj):
+    """
+    Write a dict as indented JSON, using orjson when it is installed.
+
+    Args:
+        path (str): Destination file path
+        obj (dict): JSON-serializable dict to save
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=4)
+
+# File extension -> per-array writer used by generate_problem
+_WRITERS = {
+    'csv': _save_csv,
+    'npy': _save_npy
+}
+
+# Single archive holding every array when file_format='npz'
+_ARCHIVE_FILE = 'problem.npz'
+
+def generate_problem_dict(parameters, seed=None):
+    """
+    Generate the matrices and vectors of a bi-level problem instance in memory.
     
     Args:
-        folder (str): Directory path where the problem instance will be saved
-        parameters (dict): Dictionary containing problem dimensions with keys:
-            - x_ud, y_ud: Dimensions for upper-level decoupled (continuous/binary) variables
-            - x_uc, y_uc: Dimensions for upper-level coupled (continuous/binary) variables
-            - x_ld, y_ld: Dimensions for lower-level decoupled (continuous/binary) variables
-            - x_lc, y_lc: Dimensions for lower-level coupled (continuous/binary) variables
+        parameters (dict): Dictionary containing problem dimensions, see generate_problem
+        seed (int, optional): Seed for the PCG64 random generator, for reproducible
+            instances. Defaults to None (fresh OS entropy)
     
     Returns:
-        None: Files are saved directly to the specified folder
-    
-    Files generated:
-        - metadata.json: Contains all problem parameters
-        - {matrix_type}_A.csv: Constraint matrices
-        - {matrix_type}_b.csv: Constraint vectors
-        - {objective_type}.csv: Objective function vectors
+        dict: Array name (e.g. 'G_ud_A', 'g_g_b', 'F_u') -> generated matrix/vector,
+            rounded to 6 decimals
     """
-
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-    
-    # Save parameters to metadata.json
-    with open(os.path.join(folder, 'metadata.json'), 'w') as f:
-        json.dump(parameters, f, indent=4)
-
-    # Helper function to create random matrix/vector with specified ranges
-    def create_random_matrix(size, low, high,decimal=6):
-        """
-        Generate a random matrix/vector with specified dimensions and value ranges.
-        
-        Args:
-            size (tuple): Dimensions of the matrix/vector to generate
-            low (float): Lower bound for random values
-            high (float): Upper bound for random values
-            decimal (int): Float64 if True, Float 16 if False
-        Returns:
-            np.ndarray: Generated random matrix/vector
-        """
-        return np.round(np.random.uniform(low, high, size), int(decimal))
-        
     # Variables and constraints sizes from parameters
     num_vars = {
         'x_ud': parameters['x_ud'],
@@ -73,13 +134,6 @@ def generate_problem(folder, parameters):
         'g_g': (num_vars['x_uc'] + num_vars['y_uc'] + num_vars['x_lc'] + num_vars['y_lc'])
     }
 
-    # Generate constraint matrices and vectors and save
-    for c_type, size in constraints.items():
-        A = create_random_matrix((size, size), -10, 10)
-        b = create_random_matrix(size, 0, 10)
-        pd.DataFrame(A).to_csv(os.path.join(folder, f"{c_type}_A.csv"), index=False)
-        pd.DataFrame(b).to_csv(os.path.join(folder, f"{c_type}_b.csv"), index=False)
-
     # Generate objective vectors for upper and lower levels
     objectives = {
         'F_u': (num_vars['x_ud'] + num_vars['y_ud']),
@@ -88,14 +142,106 @@ def generate_problem(folder, parameters):
         'ff_l': (num_vars['x_ld'] + num_vars['y_ld']),
         'ff_c': (num_vars['x_uc'] + num_vars['y_uc'] + num_vars['x_lc'] + num_vars['y_lc'])
     }
-    # Generate and save objective vectors
+
+    # Fill one preallocated buffer with a single RNG call, then scale its two
+    # views in place: constraint matrices and objective vectors share the
+    # [-10, 10) range, right-hand sides use [0, 10). Values are rounded in one
+    # pass since the returned arrays are used in memory as well as saved
+    rng = np.random.default_rng(seed)
+    n_coef = sum(size * size for size in constraints.values()) + sum(objectives.values())
+    n_rhs = sum(constraints.values())
+    buf = np.empty(n_coef + n_rhs, dtype=np.float64)
+    rng.random(out=buf)
+    coef = buf[:n_coef]
+    rhs = buf[n_coef:]
+    coef *= 20
+    coef -= 10
+    rhs *= 10
+    _round_inplace(buf)
+
+    # Generate constraint matrices and vectors
+    arrays = {}
+    coef_offset = 0
+    rhs_offset = 0
+    for c_type, size in constraints.items():
+        arrays[f"{c_type}_A"] = coef[coef_offset:coef_offset + size * size].reshape((size, size))
+        arrays[f"{c_type}_b"] = rhs[rhs_offset:rhs_offset + size]
+        coef_offset += size * size
+        rhs_offset += size
+
+    # Generate objective vectors
     for o_type, size in objectives.items():
-        # print(f"Generating file for {o_type} with size {size}")
-        obj_vector = create_random_matrix(size, -10, 10)
-        file_path = os.path.join(folder, f"{o_type}.csv")
-        # print(f"Saving file at: {file_path}")
-        pd.DataFrame(obj_vector).to_csv(file_path, index=False)
-        # print(f"File saved: {file_path}")
+        arrays[o_type] = coef[coef_offset:coef_offset + size]
+        coef_offset += size
+
+    return arrays
+
+def save_problem(folder, parameters, arrays, file_format='csv', metadata=None):
+    """
+    Save a problem instance generated by generate_problem_dict.
+    
+    Args:
+        folder (str): Directory path where the problem instance will be saved
+        parameters (dict): Problem dimensions, written to metadata.json
+        arrays (dict): Array name -> matrix/vector, as returned by generate_problem_dict
+        file_format (str, optional): 'csv', 'npy' or 'npz', see generate_problem.
+            Defaults to 'csv'
+        metadata (dict, optional): Extra entries (e.g. solve results) written to
+            metadata.json together with the parameters. Defaults to None
+    """
+    if file_format not in (*_WRITERS, 'npz'):
+        raise ValueError(f"Unknown file_format '{file_format}', expected one of {[*_WRITERS, 'npz']}")
+
+    # Create folder if it doesn't exist
+    os.makedirs(folder, exist_ok=True)
+    
+    # Save parameters and any extra metadata to metadata.json in a single write
+    _save_json(os.path.join(folder, 'metadata.json'), {**parameters, **(metadata or {})})
+
+    # Save every array, either bundled in one archive or one file each
+    if file_format == 'npz':
+        _save_npz(os.path.join(folder, _ARCHIVE_FILE), arrays)
+    else:
+        save = _WRITERS[file_format]
+        for name, arr in arrays.items():
+            save(os.path.join(folder, f"{name}.{file_format}"), arr)
+
+def generate_problem(folder, parameters, file_format='csv', seed=None):
+    """
+    Generate and save a bi-level optimization problem instance.
+    
+    This function creates a complete problem instance including constraint matrices,
+    objective vectors, and associated parameters for both upper and lower level
+    optimization problems.
+    
+    Args:
+        folder (str): Directory path where the problem instance will be saved
+        parameters (dict): Dictionary containing problem dimensions with keys:
+            - x_ud, y_ud: Dimensions for upper-level decoupled (continuous/binary) variables
+            - x_uc, y_uc: Dimensions for upper-level coupled (continuous/binary) variables
+            - x_ld, y_ld: Dimensions for lower-level decoupled (continuous/binary) variables
+            - x_lc, y_lc: Dimensions for lower-level coupled (continuous/binary) variables
+        file_format (str, optional): 'csv' for text files, 'npy' for binary NumPy
+            files, which skip float/text conversion on both save and load, or 'npz'
+            to bundle every array into a single problem.npz archive. Defaults to 'csv'
+        seed (int, optional): Seed for the PCG64 random generator, for reproducible
+            instances. Defaults to None (fresh OS entropy)
+    
+    Returns:
+        dict: Array name (e.g. 'G_ud_A', 'g_g_b', 'F_u') -> generated matrix/vector,
+            as saved to the specified folder
+    
+    Files generated:
+        - metadata.json: Contains all problem parameters
+        - {matrix_type}_A.{file_format}: Constraint matrices
+        - {matrix_type}_b.{file_format}: Constraint vectors
+        - {objective_type}.{file_format}: Objective function vectors
+        - problem.npz: All of the above in one archive, replacing the per-array
+          files when file_format='npz'
+    """
+    arrays = generate_problem_dict(parameters, seed=seed)
+    save_problem(folder, parameters, arrays, file_format=file_format)
+    return arrays
 #%%
 # Example usage
 '''
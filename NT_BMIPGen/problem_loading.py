@@ -9,7 +9,7 @@ Dependencies:
     - pyomo: For mathematical optimization modeling
     - pandas: For data input operations
     - numpy: For numerical operations
-    - json: For metadata handling
+    - json: For metadata handling (orjson is used instead when installed)
     - os: For file operations
 """
 #%%
@@ -17,100 +17,134 @@ from pyomo.environ import (
     Var, Binary, Reals, ConcreteModel, ConstraintList,
     Objective, minimize, SolverFactory, Param
 )
+from pyomo.core.expr.numeric_expr import LinearExpression
 import pandas as pd
 import numpy as np
 import json
 import os
+try:
+    import orjson  # Optional C-accelerated JSON decoder
+except ImportError:
+    orjson = None
 #%%
-def load_problem(folder, model, default_bounds=(-10, 10)):
+# Variable blocks and their domains
+_VAR_TYPES = {
+    'x_ud': Reals, 'x_uc': Reals, 'x_ld': Reals, 'x_lc': Reals,
+    'y_ud': Binary, 'y_uc': Binary, 'y_ld': Binary, 'y_lc': Binary
+}
+
+# Variable blocks spanned by each constraint matrix
+_CONSTRAINT_GROUPS = [
+    (['x_ud', 'y_ud'], 'G_ud'),
+    (['x_ld', 'y_ld'], 'g_ld'),
+    (['x_ud', 'y_ud', 'x_uc', 'y_uc'], 'G_uc'),
+    (['x_ld', 'y_ld', 'x_lc', 'y_lc'], 'g_lc'),
+    (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'g_g')
+]
+
+# Variable blocks spanned by each objective vector
+_OBJECTIVE_GROUPS = [
+    (['x_ud', 'y_ud'], 'F_u', 'F_pu'),
+    (['x_ld', 'y_ld'], 'F_l', 'F_pl'),
+    (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'F_c', 'F_mu'),
+    (['x_ld', 'y_ld'], 'ff_l', 'ff_pl'),
+    (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'ff_c', 'ff_ml')
+]
+
+def _load_json(path):
     """
-    Load and configure an optimization problem from files.
+    Read a JSON file, using orjson when it is installed.
+    
+    Args:
+        path: Path to the JSON file
+    
+    Returns:
+        dict: Decoded JSON content
+    """
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _build_problem(model, parameters, coefficients, default_bounds):
+    """
+    Add the variables, constraints and objectives of a problem to a model.
     
     Args:
-        folder: Path to folder containing problem definition files
         model: Pyomo model instance to configure
+        parameters (dict): Problem dimensions, as saved in metadata.json
+        coefficients (callable): coefficients(name, shape) returning the entries of
+            array `name` as nested lists of numbers or Pyomo Params
         default_bounds: Default bounds for variables (min, max)
     """
-    # Load parameters from metadata
-    with open(os.path.join(folder, 'metadata.json'), 'r') as f:
-        parameters = json.load(f)
-    
-    # Initialize variables
-    var_types = {
-        'x_ud': Reals, 'x_uc': Reals, 'x_ld': Reals, 'x_lc': Reals,
-        'y_ud': Binary, 'y_uc': Binary, 'y_ld': Binary, 'y_lc': Binary
+    # Block and group sizes, computed once and shared by every constraint/objective
+    # that spans the same variable blocks
+    sizes = {var_name: int(parameters[var_name]) for var_name in _VAR_TYPES}
+    group_sizes = {
+        tuple(var_groups): sum(sizes[x] for x in var_groups)
+        for var_groups, *_ in _CONSTRAINT_GROUPS + _OBJECTIVE_GROUPS
     }
     
-    for var_name, domain in var_types.items():
+    # Initialize variables
+    for var_name, domain in _VAR_TYPES.items():
         setattr(model, var_name, 
-                Var(range(parameters[var_name]), 
+                Var(range(sizes[var_name]), 
                     domain=domain, 
                     bounds=default_bounds))
     
     # Initialize constraints list
     model.constraints = ConstraintList()
     
+    group_vars = {}
+    
+    def flat_vars_for(var_groups):
+        """Helper function returning the variables of a group in column order, built once"""
+        key = tuple(var_groups)
+        if key not in group_vars:
+            flat_vars = []
+            for var_name in var_groups:
+                var = getattr(model, var_name)
+                flat_vars.extend(var[i] for i in range(sizes[var_name]))
+            group_vars[key] = flat_vars
+        return group_vars[key]
+    
     def add_constraints(var_groups, file_prefix):
         """Helper function to add constraints for a group of variables"""
-        if sum(parameters[x] for x in var_groups) == 0:
+        size = group_sizes[tuple(var_groups)]
+        if size == 0:
             return
             
-        A = pd.read_csv(os.path.join(folder, f"{file_prefix}_A.csv")).values
-        b = pd.read_csv(os.path.join(folder, f"{file_prefix}_b.csv")).values.flatten()
-        k = np.cumsum([parameters[x] for x in var_groups])
+        rows = coefficients(f"{file_prefix}_A", (size, size))
+        rhs = coefficients(f"{file_prefix}_b", (size,))
         
-        for i in range(b.size):
-            expr = 0
-            start_idx = 0
-            for j, var_name in enumerate(var_groups):
-                var = getattr(model, var_name)
-                end_idx = k[j]
-                cols = range(start_idx, end_idx)
-                expr += sum(A[i, j] * var[j - start_idx] for j in cols)
-                start_idx = end_idx
-            model.constraints.add(expr <= b[i])
+        # Every row becomes a single LinearExpression over the flattened
+        # group instead of a chain of nested sums
+        flat_vars = flat_vars_for(var_groups)
+        
+        # (lower, body, upper) tuples hand the bounds to Pyomo directly,
+        # skipping construction of a relational expression per row
+        for i in range(size):
+            expr = LinearExpression(constant=0, linear_coefs=rows[i], linear_vars=flat_vars)
+            model.constraints.add((None, expr, rhs[i]))
     
     def calculate_objective(var_groups, file_name):
         """Helper function to calculate objective terms"""
-        if sum(parameters[x] for x in var_groups) == 0:
+        size = group_sizes[tuple(var_groups)]
+        if size == 0:
             return 0
             
-        o = pd.read_csv(os.path.join(folder, f"{file_name}.csv")).values.flatten()
-        k = np.cumsum([parameters[x] for x in var_groups])
-        
-        expr = 0
-        start_idx = 0
-        for j, var_name in enumerate(var_groups):
-            var = getattr(model, var_name)
-            end_idx = k[j]
-            cols = range(start_idx, end_idx)
-            expr += sum(o[j] * var[j - start_idx] for j in cols)
-            start_idx = end_idx
-        return expr
+        o = coefficients(file_name, (size,))
+        return LinearExpression(constant=0, linear_coefs=o,
+                                linear_vars=flat_vars_for(var_groups))
     
     # Add constraints
-    constraint_groups = [
-        (['x_ud', 'y_ud'], 'G_ud'),
-        (['x_ld', 'y_ld'], 'g_ld'),
-        (['x_ud', 'y_ud', 'x_uc', 'y_uc'], 'G_uc'),
-        (['x_ld', 'y_ld', 'x_lc', 'y_lc'], 'g_lc'),
-        (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'g_g')
-    ]
-    
-    for var_groups, file_prefix in constraint_groups:
+    for var_groups, file_prefix in _CONSTRAINT_GROUPS:
         add_constraints(var_groups, file_prefix)
     
     # Calculate objectives
-    objective_groups = [
-        (['x_ud', 'y_ud'], 'F_u', 'F_pu'),
-        (['x_ld', 'y_ld'], 'F_l', 'F_pl'),
-        (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'F_c', 'F_mu'),
-        (['x_ld', 'y_ld'], 'ff_l', 'ff_pl'),
-        (['x_uc', 'y_uc', 'x_lc', 'y_lc'], 'ff_c', 'ff_ml')
-    ]
-    
     objectives = {}
-    for var_groups, file_name, obj_name in objective_groups:
+    for var_groups, file_name, obj_name in _OBJECTIVE_GROUPS:
         objectives[obj_name] = calculate_objective(var_groups, file_name)
     
     # Set final objectives
@@ -121,6 +155,111 @@ def load_problem(folder, model, default_bounds=(-10, 10)):
                            objectives['ff_ml'])
     
     model.objective = Objective(expr=model.upper_objective, sense=minimize)
+
+def load_problem(folder, model, default_bounds=(-10, 10)):
+    """
+    Load and configure an optimization problem from files.
+    
+    Matrices and vectors are read from a problem.npz archive when present,
+    then from binary .npy files, and from CSV files otherwise.
+    
+    Args:
+        folder: Path to folder containing problem definition files
+        model: Pyomo model instance to configure
+        default_bounds: Default bounds for variables (min, max)
+    """
+    # Load parameters from metadata
+    parameters = _load_json(os.path.join(folder, 'metadata.json'))
+    
+    # Load the whole archive in one pass when the problem was saved as .npz
+    archive = None
+    archive_path = os.path.join(folder, 'problem.npz')
+    if os.path.exists(archive_path):
+        with np.load(archive_path) as data:
+            archive = dict(data)
+    
+    def read_array(name):
+        """Helper function to read a matrix/vector saved as .npz, .npy or .csv"""
+        if archive is not None:
+            return archive[name]
+        npy_path = os.path.join(folder, f"{name}.npy")
+        if os.path.exists(npy_path):
+            return np.load(npy_path)
+        # Explicit dtype skips type sniffing; memory_map avoids an extra buffer copy
+        return pd.read_csv(os.path.join(folder, f"{name}.csv"), dtype=np.float64,
+                           engine='c', memory_map=True, header=0).to_numpy(copy=False)
+    
+    def coefficients(name, shape):
+        """Helper function returning the saved entries of an array as Python floats"""
+        return read_array(name).reshape(shape).tolist()
+    
+    _build_problem(model, parameters, coefficients, default_bounds)
+
+def load_problem_from_dict(parameters, arrays, model, default_bounds=(-10, 10)):
+    """
+    Configure an optimization problem from in-memory arrays, without touching disk.
+    
+    Args:
+        parameters (dict): Problem dimensions, as passed to generate_problem_dict
+        arrays (dict): Array name -> matrix/vector, as returned by generate_problem_dict
+        model: Pyomo model instance to configure
+        default_bounds: Default bounds for variables (min, max)
+    """
+    def coefficients(name, shape):
+        """Helper function returning the entries of an array as Python floats"""
+        return arrays[name].reshape(shape).tolist()
+    
+    _build_problem(model, parameters, coefficients, default_bounds)
+#%%
+def build_problem_template(parameters, model, default_bounds=(-10, 10)):
+    """
+    Build a reusable problem structure whose coefficients are mutable Params.
+    
+    The variables, constraints and objectives are created once for the given
+    problem dimensions; each matrix/vector is a mutable Param named after its
+    array (e.g. model.g_g_A, model.g_g_b, model.F_c). New instances of the same
+    size are then loaded with update_problem_template instead of rebuilding
+    the Pyomo expressions. The Param entries of each array are also kept in
+    model._param_plan, flattened in the array's row-major order.
+    
+    Args:
+        parameters (dict): Problem dimensions, as passed to generate_problem
+        model: Pyomo model instance to configure
+        default_bounds: Default bounds for variables (min, max)
+    """
+    param_plan = {}
+    
+    def coefficients(name, shape):
+        """Helper function creating a mutable Param for an array and returning its entries"""
+        param = Param(*(range(n) for n in shape), mutable=True, initialize=0.0)
+        setattr(model, name, param)
+        if len(shape) == 1:
+            entries = [param[i] for i in range(shape[0])]
+            param_plan[name] = entries
+            return entries
+        entries = [[param[i, j] for j in range(shape[1])] for i in range(shape[0])]
+        param_plan[name] = [param_data for row in entries for param_data in row]
+        return entries
+    
+    _build_problem(model, parameters, coefficients, default_bounds)
+    model._param_plan = param_plan
+
+def update_problem_template(model, arrays):
+    """
+    Load new coefficient values into a model built by build_problem_template.
+    
+    Args:
+        model: Pyomo model built by build_problem_template
+        arrays (dict): Array name -> matrix/vector, as returned by generate_problem
+    """
+    # The Param entries of every array were resolved once, in row-major order,
+    # by build_problem_template, so each value is set without an index lookup
+    param_plan = model._param_plan
+    for name, arr in arrays.items():
+        if arr.size == 0:  # Empty blocks have no Param
+            continue
+        for param_data, value in zip(param_plan[name], arr.ravel().tolist()):
+            param_data.set_value(value)
 #%%
 """
 Helper Functions for Bi-level Optimization Model Management
@@ -157,8 +296,8 @@ def fixed_upper(model: 'ConcreteModel') -> None:
     # Fix each variable to its current value
     for upper_param in upper_params:
         if len(upper_param) != 0:  # Only process non-empty variable sets
-            for i in upper_param:
-                upper_param[i].fix(upper_param[i].value)
+            for var_data in upper_param.values():
+                var_data.fix(var_data.value)
 #%%
 def setlowerobj(model: 'ConcreteModel') -> None:
     """
@@ -177,6 +316,18 @@ def setlowerobj(model: 'ConcreteModel') -> None:
     """
     model.objective.set_value(model.lower_objective)
 #%%
+def setupperobj(model: 'ConcreteModel') -> None:
+    """
+    Switch the model's objective back to the upper-level objective.
+    
+    Counterpart to setlowerobj(), used to restore a model for another
+    highpoint relaxation solve.
+    
+    Args:
+        model (ConcreteModel): The Pyomo optimization model to modify
+    """
+    model.objective.set_value(model.upper_objective)
+#%%
 def unfixed_upper(model: 'ConcreteModel') -> None:
     """
     Unfix all upper-level variables.
@@ -201,8 +352,7 @@ def unfixed_upper(model: 'ConcreteModel') -> None:
         model.y_ud   # Upper-level binary decoupled variables
     ]
     
-    # Unfix each variable
+    # Unfix each variable set with a single component-level call
     for upper_param in upper_params:
         if len(upper_param) != 0:  # Only process non-empty variable sets
-            for i in upper_param:
-                upper_param[i].unfix()
\ No newline at end of file
+            upper_param.unfix()
\ No newline at end of file
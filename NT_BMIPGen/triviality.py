@@ -13,101 +13,305 @@ The module includes utilities for:
 Dependencies:
     - pyomo.environ: For mathematical modeling
     - tqdm: For progress tracking
-    - json: For metadata handling
-    - shutil: For file operations
     - os: For directory management
 """
 #%%
-from .problem_loading import load_problem, fixed_upper, setlowerobj
-from .problem_generator import generate_problem
+from .problem_loading import (
+    build_problem_template, update_problem_template,
+    fixed_upper, unfixed_upper, setlowerobj, setupperobj
+)
+from .problem_generator import generate_problem_dict, save_problem
 from pyomo.environ import ConcreteModel, SolverFactory
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+import importlib.util
+import multiprocessing as mp
 from tqdm import tqdm
-import json
-import shutil
+import warnings
 import os
 #%%
-def Triviality_calculate(parameters, problems_name="problems_folder", N_eval=30, solver_name="gurobi"):
+# Template models kept per process. Sweeps evaluate one problem size at a time,
+# so only the most recently used sizes are kept. Like the solvers from
+# _get_solver, they are shared by every in-process caller, so evaluation is
+# not thread-safe; parallel runs use worker processes
+_TEMPLATE_CACHE_SIZE = 2
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _build_template(key):
+    """
+    Build the template model for one set of problem dimensions.
+    
+    Args:
+        key (tuple): Sorted (name, value) pairs of the problem generation parameters
+    
+    Returns:
+        ConcreteModel: Model built by build_problem_template
+    """
+    model = ConcreteModel()
+    build_problem_template(dict(key), model)
+    return model
+
+def _problem_template(parameters):
+    """
+    Return this process's template model for the given dimensions, building it on first use.
+    
+    Args:
+        parameters (dict): Problem generation parameters
+    
+    Returns:
+        ConcreteModel: Model built by build_problem_template, reset to its
+            unfixed, upper-objective state
+    """
+    model = _build_template(tuple(sorted(parameters.items())))
+    unfixed_upper(model=model)
+    setupperobj(model=model)
+    return model
+
+@lru_cache(maxsize=None)
+def _get_solver(solver_name, solver_options):
+    """
+    Return this process's solver instance for a name and set of options, creating it on first use.
+    
+    SolverFactory resolves the solver plugin (and, for shell solvers, the
+    executable) on every call, so one instance is reused across candidates
+    and across repeated Triviality_calculate calls, e.g. in a heatmap sweep.
+    When gurobipy is installed, "gurobi" uses the in-process gurobi_persistent
+    interface rather than launching gurobi_cl and exchanging LP files for every
+    solve; without it, the gurobi_cl shell driver is used.
+    
+    Args:
+        solver_name (str): Name of the solver to use
+        solver_options (tuple): Sorted (option name, value) pairs set on the solver
+    
+    Returns:
+        Solver instance created by SolverFactory
+    """
+    if solver_name == "gurobi" and importlib.util.find_spec("gurobipy") is not None:
+        solver = SolverFactory("gurobi_persistent")
+    else:
+        solver = SolverFactory(solver_name)
+    solver.options.update(dict(solver_options))
+    return solver
+
+# Forked workers build their own solvers instead of sharing the parent's
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_get_solver.cache_clear)
+
+@contextmanager
+def _worker_map(n_workers):
+    """
+    Provide a map function that evaluates problems on n_workers processes.
+    
+    Each problem is generated and solved independently, so the work is spread
+    over a process pool; the solver calls run in native code and scale with
+    the number of cores. Workers are forked where the platform allows it, so
+    they start quickly.
+    
+    Args:
+        n_workers (int): Number of worker processes, 1 to evaluate in-process
+    
+    Yields:
+        callable: map-like function returning results in submission order
+    """
+    if n_workers == 1:
+        yield map
+        return
+    context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+        yield executor.map
+
+def _progress(iterable=None, total=None, desc=None):
+    """
+    Create a progress bar that redraws at most about once a second.
+    
+    Bars are skipped for fewer than 5 items, and inside worker processes
+    (e.g. the heatmap sweep's pool), where concurrent bars would garble the
+    output. Otherwise tqdm's own TQDM_DISABLE environment variable applies.
+    
+    Args:
+        iterable (iterable, optional): Iterable to wrap
+        total (int, optional): Expected number of items. Defaults to None
+            (len(iterable) when it has a length, otherwise unknown)
+        desc (str, optional): Bar description
+    
+    Returns:
+        tqdm: Progress bar
+    """
+    if total is None and hasattr(iterable, "__len__"):
+        total = len(iterable)
+    options = {"mininterval": 1.0}
+    if total is not None:
+        options["miniters"] = max(1, total // 20)
+    if (total is not None and total < 5) or mp.current_process().name != "MainProcess":
+        options["disable"] = True
+    return tqdm(iterable, total=total, desc=desc, **options)
+
+def _solver_options(solver_name, n_workers, solver_options=None):
+    """
+    Build the options passed to every solver instance.
+    
+    Gurobi gets an explicit thread count that splits the machine's cores evenly
+    between the worker processes, so parallel solves do not oversubscribe the CPU.
+    Crossover is left on: the RF solve fixes the upper-level variables at the RO
+    solution, so that solution has to be a vertex rather than a barrier point.
+    
+    Args:
+        solver_name (str): Name of the solver to use
+        n_workers (int): Number of worker processes solving concurrently
+        solver_options (dict, optional): User options overriding the defaults
+    
+    Returns:
+        dict: Solver option name -> value
+    """
+    options = {}
+    if solver_name.startswith("gurobi"):
+        options["Threads"] = max(1, (os.cpu_count() or 1) // n_workers)
+    options.update(solver_options or {})
+    return options
+
+def _eval_one(parameters, solver_name, solver_options):
+    """
+    Generate and solve a single candidate problem in memory.
+    
+    Args:
+        parameters (dict): Problem generation parameters
+        solver_name (str): Name of the solver to use
+        solver_options (dict): Options set on the solver before solving
+    
+    Returns:
+        tuple: (arrays, RO_Obj, RF_Obj, gap) for the candidate, where arrays are
+            the generated matrices/vectors to save if the problem is kept
+    """
+    # Problem generation and model setup: the Pyomo structure is reused across
+    # candidates of the same size, only the coefficient values are replaced
+    arrays = generate_problem_dict(parameters)
+    mymodel = _problem_template(parameters)
+    update_problem_template(mymodel, arrays)
+
+    solver = _get_solver(solver_name, tuple(sorted(solver_options.items())))
+    if isinstance(solver, PersistentSolver):
+        # Persistent solvers keep the model in memory: send it once, then push
+        # only the fixed upper-level variables and the new objective
+        solver.set_instance(mymodel)
+
+        # Solve relaxed optimization
+        solver.solve()
+        RO_Obj = mymodel.objective()
+
+        # Solve fixed upper-level problem. The RO solution stays feasible once the
+        # upper-level variables are fixed at it, so it is passed as a MIP start
+        fixed_upper(model=mymodel)
+        for upper_param in (mymodel.x_uc, mymodel.y_uc, mymodel.x_ud, mymodel.y_ud):
+            for var_data in upper_param.values():
+                solver.update_var(var_data)
+        setlowerobj(model=mymodel)
+        solver.set_objective(mymodel.objective)
+        solver.solve(warmstart=True)
+        RF_Obj = mymodel.upper_objective()
+    else:
+        # Solve relaxed optimization
+        solver.solve(mymodel)
+        RO_Obj = mymodel.objective()
+
+        # Solve fixed upper-level problem, warm-started from the RO solution
+        # when the solver supports it
+        fixed_upper(model=mymodel)
+        setlowerobj(model=mymodel)
+        if solver.warm_start_capable():
+            solver.solve(mymodel, warmstart=True)
+        else:
+            solver.solve(mymodel)
+        RF_Obj = mymodel.upper_objective()
+
+    # Calculate optimality gap; RO relaxes RF, so the gap is non-negative up to
+    # solver tolerances
+    gap = RF_Obj - RO_Obj
+    if gap < -1e-4:
+        warnings.warn(f"RF objective is below the highpoint relaxation (gap = {gap:.6g}); "
+                      "check the solver tolerances", RuntimeWarning)
+    return arrays, RO_Obj, RF_Obj, gap
+
+def _keep_problem(problem_name, parameters, arrays, RO_Obj, RF_Obj, gap):
+    """
+    Save a non-trivial candidate and record its objectives.
+    
+    Args:
+        problem_name (str): Folder path of the problem
+        parameters (dict): Problem generation parameters
+        arrays (dict): Generated matrices/vectors of the problem
+        RO_Obj (float): Highpoint relaxation objective
+        RF_Obj (float): Fixed upper-level objective
+        gap (float): RF_Obj - RO_Obj
+    """
+    save_problem(problem_name, parameters, arrays, metadata={
+        "RO_Obj": RO_Obj,
+        "RF_Obj": RF_Obj,
+        "Gap": gap
+    })
+
+def Triviality_calculate(parameters, problems_name="problems_folder", N_eval=30, solver_name="gurobi", n_workers=None, solver_options=None):
     """
     Calculate the triviality percentage of generated BMIP problems.
     
     A problem is considered trivial if the gap between its highpoint relaxation optimization (RO)
-    objective and fixed upper-level (RF) objective is negligible (< 1e-6).
+    objective and fixed upper-level (RF) objective is negligible (RF_Obj - RO_Obj < 1e-6).
     
     Args:
         parameters (dict): Problem generation parameters
         problems_name (str, optional): Directory name for storing problems. Defaults to "problems_folder"
         N_eval (int, optional): Number of problems to evaluate. Defaults to 30
-        solver_name (str, optional): Name of the solver to use. Defaults to "gurobi"
+        solver_name (str, optional): Name of the solver to use. Persistent solvers keep the
+            model loaded between the RO and RF solves; "gurobi" runs as gurobi_persistent
+            when gurobipy is installed. Defaults to "gurobi"
+        n_workers (int, optional): Number of worker processes evaluating problems in parallel.
+            Defaults to None (one per CPU core)
+        solver_options (dict, optional): Extra solver options, e.g. {"Threads": 4} for Gurobi.
+            Defaults to None (Gurobi threads split evenly across workers)
     
     Returns:
         float: Percentage of problems that were found to be trivial
     
     Side Effects:
         - Creates a directory specified by problems_name if it doesn't exist
-        - Generates problem files in the specified directory
-        - Removes trivial problem instances
+        - Saves non-trivial problem instances in the specified directory;
+          trivial ones are only generated in memory
         - Updates metadata.json for non-trivial problems
+    
+    Notes:
+        - Parallelism is process-based (n_workers). Calling this function from several
+          threads of one process at once is not supported: in-process evaluation shares
+          a template model and solver instance per problem size
     """
     count = 0
+    n_workers = n_workers or os.cpu_count() or 1
+    solver_options = _solver_options(solver_name, n_workers, solver_options)
     
-    # Create and change to problems directory
-    if not os.path.exists(problems_name):
-        os.makedirs(problems_name)
-    os.chdir(problems_name)
-
-    # Evaluate problems with progress tracking
-    for i in tqdm(range(N_eval), desc="Evaluating Problems"):
-        problem_name = f"problem_{i - count + 1}"
-        
-        # Problem generation and model setup
-        generate_problem(problem_name, parameters)
-        mymodel = ConcreteModel()
-        load_problem(problem_name, model=mymodel)
-
-        # Solve relaxed optimization
-        solver = SolverFactory(solver_name)
-        solver.solve(mymodel)
-        RO_Obj = mymodel.objective()
+    # Create problems directory; all paths are absolute so the working directory is never changed
+    problems_dir = os.path.abspath(problems_name)
+    os.makedirs(problems_dir, exist_ok=True)
 
-        # Solve fixed upper-level problem
-        fixed_upper(model=mymodel)
-        setlowerobj(model=mymodel)
-        solver.solve(mymodel)
-        RF_Obj = mymodel.upper_objective()
+    # Evaluate problems in parallel, consuming results in order with progress tracking
+    with _worker_map(n_workers) as worker_map:
+        results = worker_map(_eval_one, repeat(parameters, N_eval), repeat(solver_name),
+                             repeat(solver_options))
+        for i, (arrays, RO_Obj, RF_Obj, gap) in enumerate(
+                _progress(results, total=N_eval, desc="Evaluating Problems")):
+            # Trivial cases (gap < 1e-6) are never written to disk
+            if gap < 1e-6:
+                count += 1
+                continue
 
-        # Calculate optimality gap
-        gap = RF_Obj - RO_Obj
-
-        # Handle trivial cases (gap < 1e-6)
-        if abs(gap) < 1e-6:
-            if os.path.exists(problem_name):
-                shutil.rmtree(problem_name)
-            count += 1
-            continue
-
-        # Update metadata for non-trivial problems
-        metadata_file = os.path.join(problem_name, "metadata.json")
-        metadata = {}
-        if os.path.exists(metadata_file):
-            with open(metadata_file, "r") as file:
-                metadata = json.load(file)
-        
-        metadata.update({
-            "RO_Obj": RO_Obj,
-            "RF_Obj": RF_Obj,
-            "Gap": gap
-        })
-        
-        with open(metadata_file, "w") as file:
-            json.dump(metadata, file, indent=4)
-
-    os.chdir("..")
+            _keep_problem(os.path.join(problems_dir, f"problem_{i - count + 1}"), parameters, arrays,
+                          RO_Obj, RF_Obj, gap)
     
     trivial_percentage = count / N_eval * 100
     print(f"Trivial %: {trivial_percentage:.2f}%")
     return trivial_percentage
 
-def nontrivial_BMIP_generator(parameters, N_gen=10, I=3, problems_name="problems_folder", solver_name="gurobi"):
+def nontrivial_BMIP_generator(parameters, N_gen=10, I=3, problems_name="problems_folder", solver_name="gurobi", n_workers=None, solver_options=None):
     """
     Generate a specified number of non-trivial BMIP problems.
     
@@ -119,7 +323,13 @@ def nontrivial_BMIP_generator(parameters, N_gen=10, I=3, problems_name="problems
         N_gen (int, optional): Number of non-trivial problems to generate. Defaults to 10
         I (int, optional): Multiplier for maximum attempts (max_attempts = I * N_gen). Defaults to 3
         problems_name (str, optional): Directory name for storing problems. Defaults to "problems_folder"
-        solver_name (str, optional): Name of the solver to use. Defaults to "gurobi"
+        solver_name (str, optional): Name of the solver to use. Persistent solvers keep the
+            model loaded between the RO and RF solves; "gurobi" runs as gurobi_persistent
+            when gurobipy is installed. Defaults to "gurobi"
+        n_workers (int, optional): Number of worker processes evaluating problems in parallel.
+            Defaults to None (one per CPU core)
+        solver_options (dict, optional): Extra solver options, e.g. {"Threads": 4} for Gurobi.
+            Defaults to None (Gurobi threads split evenly across workers)
     
     Returns:
         tuple: (trivial_percentage, count_nontrivial)
@@ -128,80 +338,61 @@ def nontrivial_BMIP_generator(parameters, N_gen=10, I=3, problems_name="problems
     
     Side Effects:
         - Creates a directory specified by problems_name if it doesn't exist
-        - Generates problem files in the specified directory
-        - Removes trivial problem instances
+        - Saves non-trivial problem instances in the specified directory;
+          trivial ones are only generated in memory
         - Updates metadata.json for non-trivial problems
     
     Notes:
-        - A problem is considered trivial if |RF_Obj - RO_Obj| < 1e-6
+        - A problem is considered trivial if RF_Obj - RO_Obj < 1e-6
         - The function will stop if either N_gen non-trivial problems are generated
           or if the maximum number of attempts (I * N_gen) is reached
+        - Problems are evaluated in waves of n_workers; candidates left over once
+          N_gen non-trivial problems are found are discarded and not counted
+        - Parallelism is process-based (n_workers). Calling this function from several
+          threads of one process at once is not supported: in-process evaluation shares
+          a template model and solver instance per problem size
     """
     count_trivial = 0
     count_nontrivial = 0
     max_iterations = I * N_gen
+    n_workers = n_workers or os.cpu_count() or 1
+    solver_options = _solver_options(solver_name, n_workers, solver_options)
+    iteration = 0
+    attempted = 0
 
-    # Setup problems directory
-    if not os.path.exists(problems_name):
-        os.makedirs(problems_name)
-    os.chdir(problems_name)
-
-    # Generate problems with progress tracking
-    with tqdm(total=N_gen, desc="Generating Non-Trivial Cases") as pbar:
-        for iteration in range(max_iterations):
-            problem_name = f"problem_{count_nontrivial+1}"
-            
-            # Generate and solve problem
-            generate_problem(problem_name, parameters)
-            mymodel = ConcreteModel()
-            load_problem(problem_name, model=mymodel)
-
-            # Solve relaxed optimization
-            solver = SolverFactory(solver_name)
-            solver.solve(mymodel)
-            RO_Obj = mymodel.objective()
+    # Setup problems directory; all paths are absolute so the working directory is never changed
+    problems_dir = os.path.abspath(problems_name)
+    os.makedirs(problems_dir, exist_ok=True)
 
-            # Solve fixed upper-level problem
-            fixed_upper(model=mymodel)
-            setlowerobj(model=mymodel)
-            solver.solve(mymodel)
-            RF_Obj = mymodel.upper_objective()
-
-            gap = RF_Obj - RO_Obj
-
-            # Process based on triviality
-            if abs(gap) < 1e-6:
-                if os.path.exists(problem_name):
-                    shutil.rmtree(problem_name)
-                count_trivial += 1
-            else:
-                # Update metadata for non-trivial problems
-                metadata_file = os.path.join(problem_name, "metadata.json")
-                metadata = {}
-                if os.path.exists(metadata_file):
-                    with open(metadata_file, "r") as file:
-                        metadata = json.load(file)
-                
-                metadata.update({
-                    "RO_Obj": RO_Obj,
-                    "RF_Obj": RF_Obj,
-                    "Gap": gap
-                })
-                
-                with open(metadata_file, "w") as file:
-                    json.dump(metadata, file, indent=4)
-                
-                count_nontrivial += 1
-                pbar.update(1)
-
-            # Check termination conditions
-            if count_nontrivial >= N_gen:
-                break
-            if iteration + 1 >= max_iterations:
-                print(f"Reached maximum iterations ({max_iterations}).")
-                break
-
-    os.chdir("..")
+    # Generate problems in waves of parallel candidates with progress tracking
+    with _worker_map(n_workers) as worker_map, \
+            _progress(total=N_gen, desc="Generating Non-Trivial Cases") as pbar:
+        done = False
+        while not done and attempted < max_iterations:
+            wave = range(attempted, min(attempted + n_workers, max_iterations))
+            attempted = wave.stop
+            results = worker_map(_eval_one, repeat(parameters, len(wave)), repeat(solver_name),
+                                 repeat(solver_options))
+
+            for iteration, (arrays, RO_Obj, RF_Obj, gap) in zip(wave, results):
+                # Process based on triviality; trivial cases are never written to disk
+                if gap < 1e-6:
+                    count_trivial += 1
+                else:
+                    _keep_problem(os.path.join(problems_dir, f"problem_{count_nontrivial + 1}"),
+                                  parameters, arrays, RO_Obj, RF_Obj, gap)
+                    count_nontrivial += 1
+                    pbar.update(1)
+
+                # Check termination conditions
+                if count_nontrivial >= N_gen:
+                    done = True
+                elif iteration + 1 >= max_iterations:
+                    print(f"Reached maximum iterations ({max_iterations}).")
+                    done = True
+                if done:
+                    # Discard candidates beyond the requested number of problems
+                    break
     
     # Calculate and return statistics
     trivial_percentage = count_trivial / iteration * 100 if iteration > 0 else 0
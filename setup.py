@@ -20,6 +20,9 @@ setup(
         "matplotlib>=3.0.0",
         "pandas>=2.0.0"
     ],
+    extras_require={
+        "fast": ["orjson>=3.0"]
+    },
     classifiers=[
     'Programming Language :: Python :: 3',
     'License :: OSI Approved :: MIT License',
@@ -1,17 +1,26 @@
 #%%
 from triviality import nontrivial_BMIP_generator, Triviality_calculate
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
 import numpy as np
 import matplotlib.pyplot as plt
+import os
 
 #%%
-parameters = {
-    'x_ud':0, 'y_ud': 0, 'x_uc': 20, 'y_uc': 0,
-    'x_ld': 0, 'y_ld': 0, 'x_lc': 20, 'y_lc': 0,
-    'G_ud': 0, 'g_ld': 0, 'G_uc': 0, 'g_lc': 0, 'g_g': 20
-}
-nontrivial_BMIP_generator(parameters, N_gen=5, I=5, problems_name = "problems_folder", solver_name="gurobi")
+# Cells that start process pools only run in the main script, so spawned
+# workers (macOS, Windows) can re-import this file without resubmitting them
+if __name__ == "__main__":
+    parameters = {
+        'x_ud':0, 'y_ud': 0, 'x_uc': 20, 'y_uc': 0,
+        'x_ld': 0, 'y_ld': 0, 'x_lc': 20, 'y_lc': 0,
+        'G_ud': 0, 'g_ld': 0, 'G_uc': 0, 'g_lc': 0, 'g_g': 20
+    }
+    nontrivial_BMIP_generator(parameters, N_gen=5, I=5, problems_name = "problems_folder", solver_name="gurobi")
 # %% Heatmap
 
+# Gurobi threads per heatmap point; the sweep runs cpu_count // threads_per_solver points at once
+threads_per_solver = 1
+
 # Step 1: Define the function f(a, b)
 def f(a, b):
     parameters = {
@@ -19,36 +28,45 @@ def f(a, b):
     'x_ld': 0, 'y_ld': 0, 'x_lc': b, 'y_lc': 0,
     'C_ud': 0, 'C_ld': 0, 'C_uc': 0, 'C_lc': 0, 'C_g': 20
 }
-    return  Triviality_calculate(parameters,N_eval=30) # Example function, replace with your function
+    # Each point evaluates in-process (the sweep is already parallel) in its own folder
+    return  Triviality_calculate(parameters, problems_name=f"problems_folder_{a}_{b}", N_eval=30,
+                                 n_workers=1, solver_options={"Threads": threads_per_solver}) # Example function, replace with your function
 
-# Step 2: Create a range of values for a and b
-a_values = np.linspace(2, 20, 10)
-b_values = np.linspace(2, 20, 10)
+def f_wrapper(job):
+    return f(*job)
 
-# Step 3: Create a grid and initialize Z for results
-Z = np.zeros((len(a_values), len(b_values)))
+if __name__ == "__main__":
+    # Step 2: Create a range of values for a and b
+    a_values = np.linspace(2, 20, 10)
+    b_values = np.linspace(2, 20, 10)
 
-# Evaluate f(a, b) point by point to avoid passing arrays
-for i, a in enumerate(a_values):
-    for j, b in enumerate(b_values):
-        Z[j, i] = f(int(a), int(b))  # Store each result in Z
+    # Step 3: Evaluate every (a, b) point as an independent job on a process pool
+    jobs = [(int(a), int(b)) for a in a_values for b in b_values]
+    n_pool = max(1, (os.cpu_count() or 1) // threads_per_solver)
+    # Fork where the platform allows it, otherwise fall back to the default start method
+    context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=n_pool, mp_context=context) as executor:
+        # Jobs are submitted row by row, so results fill Z[i, j] (a index, b index) in C order
+        Z = np.fromiter(executor.map(f_wrapper, jobs), dtype=float,
+                        count=len(jobs)).reshape(len(a_values), len(b_values))
 #%%
-# Step 4: Plot the heatmap
-# Assuming Z has already been computed
-plt.figure(figsize=(8, 6))
-plt.imshow(Z, extent=[2, 20, 2, 20], origin='lower', cmap='viridis', aspect='auto')
-
-# Colorbar with larger font size
-cbar = plt.colorbar(label="Trivial %")
-cbar.ax.tick_params(labelsize=14)
-cbar.set_label("Trivial %", fontsize=16)
-cbar.mappable.set_clim(0, 100)
-
-# Increase font size for labels and title
-plt.xlabel("Number of coupled upper level variables", fontsize=16)
-plt.ylabel("Number of coupled lower level variables", fontsize=16)
-plt.title("Heatmap of Trivial Percentage", fontsize=18)
-
-# Display the plot
-plt.show()
-# %%
+if __name__ == "__main__":
+    # Step 4: Plot the heatmap
+    # Assuming Z has already been computed; Z.T puts a on the x-axis and b on the y-axis
+    plt.figure(figsize=(8, 6))
+    plt.imshow(Z.T, extent=[2, 20, 2, 20], origin='lower', cmap='viridis', aspect='auto')
+
+    # Colorbar with larger font size
+    cbar = plt.colorbar(label="Trivial %")
+    cbar.ax.tick_params(labelsize=14)
+    cbar.set_label("Trivial %", fontsize=16)
+    cbar.mappable.set_clim(0, 100)
+
+    # Increase font size for labels and title
+    plt.xlabel("Number of coupled upper level variables", fontsize=16)
+    plt.ylabel("Number of coupled lower level variables", fontsize=16)
+    plt.title("Heatmap of Trivial Percentage", fontsize=18)
+
+    # Display the plot
+    plt.show()
+# %%
\ No newline at end of file